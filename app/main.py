@@ -1,6 +1,19 @@
+import os
+
+# Must be set before torch/tokenizers get imported below: with one
+# worker per core, per-process thread pools only oversubscribe the CPU
+os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+os.environ.setdefault("OMP_NUM_THREADS", "1")
+os.environ.setdefault("MKL_NUM_THREADS", "1")
+# Tells the embedders to keep each forward single-threaded; offline
+# entry points like index_book.py leave this unset
+os.environ.setdefault("EMBED_SINGLE_THREAD", "1")
+
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.routers import chat
+from app.services.rag_service import RAGService
 import logging
 
 logging.basicConfig(
@@ -8,10 +21,19 @@ logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load the model at startup instead of on the first request. Lifespan
+    # runs after fork, so each worker loads its own copy; budget RAM
+    # accordingly when scaling worker count.
+    app.state.rag = RAGService()
+    yield
+
 app = FastAPI(
     title="Physical AI Textbook API",
     version="1.0.0",
-    description="RAG chatbot backend for Physical AI & Humanoid Robotics textbook"
+    description="RAG chatbot backend for Physical AI & Humanoid Robotics textbook",
+    lifespan=lifespan
 )
 
 app.add_middleware(
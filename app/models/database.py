@@ -1,8 +1,9 @@
+import os
 from sqlalchemy import create_engine, Column, Integer, String, DateTime, Text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime
-from app.utils.config import settings
+from app.utils.config import get_settings
 
 Base = declarative_base()
 
@@ -18,7 +19,30 @@ class ChatHistory(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
 
 # Create database engine (optional, only if using database)
+settings = get_settings()
+engine = None
+SessionLocal = None
+
 if settings.database_url:
-    engine = create_engine(settings.database_url)
+    engine = create_engine(
+        settings.database_url,
+        pool_size=20,
+        max_overflow=10,
+        pool_pre_ping=True,
+        pool_recycle=300
+    )
     SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-    Base.metadata.create_all(bind=engine)
\ No newline at end of file
+
+    # Schema creation is a migration step, not an import side effect
+    if os.getenv("RUN_MIGRATIONS"):
+        Base.metadata.create_all(bind=engine)
+
+def get_db():
+    """FastAPI dependency yielding a pooled database session."""
+    if SessionLocal is None:
+        raise RuntimeError("database_url is not configured")
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
\ No newline at end of file
@@ -1,28 +1,25 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Optional
 from app.services.rag_service import RAGService
+import json
 import logging
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/chat", tags=["chat"])
 
-# Don't initialize here - do it lazily
-rag_service = None
-
-def get_rag_service():
-    """Lazy initialization of RAG service."""
-    global rag_service
-    if rag_service is None:
-        rag_service = RAGService()
-    return rag_service
+def get_rag_service(http_request: Request) -> RAGService:
+    """Return the process-wide RAG service created at startup."""
+    return http_request.app.state.rag
 
 class ChatRequest(BaseModel):
     """Request model for chat endpoint."""
     message: str
     context: Optional[str] = None
     user_id: Optional[str] = None
+    stream: bool = False
 
 class ChatResponse(BaseModel):
     """Response model for chat endpoint."""
@@ -30,8 +27,18 @@ class ChatResponse(BaseModel):
     sources: list[str]
     confidence: float
 
+async def _sse_events(service: RAGService, request: "ChatRequest"):
+    """Wrap streamed answer tokens as server-sent events."""
+    async for token in service.generate_answer_stream(
+        question=request.message,
+        context=request.context
+    ):
+        # JSON-encode so tokens containing newlines survive SSE framing
+        yield f"data: {json.dumps(token)}\n\n"
+    yield "data: [DONE]\n\n"
+
 @router.post("/", response_model=ChatResponse)
-async def chat(request: ChatRequest) -> ChatResponse:
+async def chat(request: ChatRequest, http_request: Request):
     """Process user question using RAG."""
     try:
         if not request.message.strip():
@@ -39,8 +46,15 @@ async def chat(request: ChatRequest) -> ChatResponse:
                 status_code=400,
                 detail="Message cannot be empty"
             )
-        
-        service = get_rag_service()
+
+        service = get_rag_service(http_request)
+
+        if request.stream:
+            return StreamingResponse(
+                _sse_events(service, request),
+                media_type="text/event-stream"
+            )
+
         result = await service.generate_answer(
             question=request.message,
             context=request.context
@@ -61,11 +75,17 @@ async def chat(request: ChatRequest) -> ChatResponse:
             detail="An error occurred processing your request"
         )
 
+@router.get("/cache-stats")
+async def cache_stats(http_request: Request):
+    """Report search cache hit-rate for observability."""
+    service = get_rag_service(http_request)
+    return service._search_cache.stats()
+
 @router.post("/index-document")
-async def index_document(text: str, source: str, doc_id: int):
+async def index_document(text: str, source: str, doc_id: int, http_request: Request):
     """Index a document in the vector store."""
     try:
-        service = get_rag_service()
+        service = get_rag_service(http_request)
         await service.add_document(text, source, doc_id)
         return {"status": "success", "message": f"Indexed document: {source}"}
     except Exception as e:
@@ -0,0 +1,68 @@
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+class EmbedBatcher:
+    """Coalesces concurrent single-text embed calls into real batches.
+
+    Each caller's text waits up to max_wait_ms in a queue; a background
+    worker then encodes the whole batch in one model call and fans the
+    results back out, so concurrent requests feed the model batches
+    instead of single strings.
+    """
+
+    def __init__(self, model, executor, max_batch: int = 32, max_wait_ms: float = 5.0):
+        self.model = model
+        self.executor = executor
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = asyncio.Queue()
+        self._worker = None
+
+    async def embed(self, text: str):
+        """Queue a text and wait for its embedding."""
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, future))
+        return await future
+
+    def _encode_batch(self, texts: list[str]):
+        return self.model.encode(
+            texts,
+            batch_size=self.max_batch,
+            convert_to_numpy=True,
+            normalize_embeddings=True
+        )
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            items = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+
+            # Let more callers join the batch for up to max_wait
+            while len(items) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    items.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            texts = [text for text, _ in items]
+            try:
+                vectors = await loop.run_in_executor(
+                    self.executor, self._encode_batch, texts
+                )
+                for (_, future), vector in zip(items, vectors):
+                    if not future.done():
+                        future.set_result(vector)
+            except Exception as e:
+                logger.error(f"Error encoding batch: {e}")
+                for _, future in items:
+                    if not future.done():
+                        future.set_exception(e)
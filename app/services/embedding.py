@@ -0,0 +1,187 @@
+import logging
+import os
+from pathlib import Path
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+
+# Populated by quantize_model.py at build time
+QUANTIZED_MODEL_DIR = Path("onnx_model_int8")
+
+def _batch_features(enc, idx) -> list[dict]:
+    """Collect per-item tokenizer features for one microbatch.
+
+    token_type_ids must be carried through: the ONNX export of the BERT
+    encoder requires them as a graph input.
+    """
+    keys = [k for k in ("input_ids", "attention_mask", "token_type_ids") if k in enc]
+    return [{k: enc[k][i] for k in keys} for i in idx]
+
+def _single_thread_inference() -> bool:
+    """True in the server, where embeds run one per core on a thread pool.
+
+    app/main.py sets the flag at startup; offline entry points like
+    index_book.py leave it unset so batch encodes keep all cores.
+    """
+    return os.environ.get("EMBED_SINGLE_THREAD") == "1"
+
+class ONNXEmbedder:
+    """all-MiniLM-L6-v2 served as an INT8 ONNX model on CPU.
+
+    Keeps the same encode() API as SentenceTransformer so RAGService
+    doesn't care which backend is loaded.
+    """
+
+    def __init__(self, model_dir: str):
+        import onnxruntime
+        from optimum.onnxruntime import ORTModelForFeatureExtraction
+        from transformers import AutoTokenizer
+
+        # onnxruntime has its own intra-op pool and ignores OMP_NUM_THREADS,
+        # so the server must pin it explicitly to one thread per forward
+        session_options = None
+        if _single_thread_inference():
+            session_options = onnxruntime.SessionOptions()
+            session_options.intra_op_num_threads = 1
+
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.model = ORTModelForFeatureExtraction.from_pretrained(
+            model_dir,
+            provider="CPUExecutionProvider",
+            session_options=session_options
+        )
+
+    def encode(self, texts, batch_size: int = 64, convert_to_numpy: bool = True,
+               normalize_embeddings: bool = True, show_progress_bar: bool = False):
+        """Embed a string or list of strings, mirroring SentenceTransformer.encode."""
+        single = isinstance(texts, str)
+        if single:
+            texts = [texts]
+
+        # Tokenize everything in one call, then batch by token length so
+        # each padded microbatch wastes as little compute as possible
+        enc = self.tokenizer(texts, padding=False, truncation=True, max_length=256)
+        order = np.argsort([len(ids) for ids in enc["input_ids"]])
+
+        result = None
+        # Batches larger than 16 are needed for the int8 GEMM kernels to pay off
+        for start in range(0, len(order), batch_size):
+            idx = order[start:start + batch_size]
+            padded = self.tokenizer.pad(_batch_features(enc, idx), return_tensors="np")
+            outputs = self.model(**padded)
+            pooled = self._mean_pool(outputs.last_hidden_state, padded["attention_mask"])
+            if result is None:
+                result = np.empty((len(texts), pooled.shape[1]), dtype=pooled.dtype)
+            result[idx] = pooled
+
+        if normalize_embeddings:
+            result = result / np.linalg.norm(result, axis=1, keepdims=True)
+        return result[0] if single else result
+
+    @staticmethod
+    def _mean_pool(hidden_state, attention_mask):
+        """Mean-pool token embeddings, ignoring padding positions."""
+        mask = np.expand_dims(attention_mask, axis=-1).astype(np.float32)
+        summed = (hidden_state * mask).sum(axis=1)
+        counts = np.clip(mask.sum(axis=1), 1e-9, None)
+        return summed / counts
+
+class TorchEmbedder:
+    """all-MiniLM-L6-v2 run through transformers in bfloat16.
+
+    Halving the weight/activation width halves memory bandwidth, which
+    dominates MiniLM inference; only the pooled output is upcast to FP32
+    before normalization.
+    """
+
+    def __init__(self):
+        import torch
+        from transformers import AutoModel, AutoTokenizer
+
+        self.torch = torch
+        if torch.cuda.is_available():
+            self.device = "cuda"
+            dtype = torch.bfloat16 if torch.cuda.is_bf16_supported() else torch.float16
+        elif torch.backends.mps.is_available():
+            self.device = "mps"
+            dtype = torch.float16
+        else:
+            self.device = "cpu"
+            dtype = torch.bfloat16
+            if _single_thread_inference():
+                # Server embeds run on a thread pool sized to the core count,
+                # so each forward must stay single-threaded
+                torch.set_num_threads(1)
+                try:
+                    torch.set_num_interop_threads(1)
+                except RuntimeError:
+                    # Already set, or parallel work has started; keep going
+                    pass
+
+        self.tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
+        self.model = AutoModel.from_pretrained(MODEL_NAME, torch_dtype=dtype)
+        self.model.to(self.device)
+        self.model.eval()
+        logger.info(f"TorchEmbedder using device={self.device}, dtype={dtype}")
+
+    def encode(self, texts, batch_size: int = 64, convert_to_numpy: bool = True,
+               normalize_embeddings: bool = True, show_progress_bar: bool = False):
+        """Embed a string or list of strings, mirroring SentenceTransformer.encode."""
+        import torch.nn.functional as F
+
+        torch = self.torch
+        single = isinstance(texts, str)
+        if single:
+            texts = [texts]
+
+        # A GPU needs bigger batches than the CPU default to stay busy
+        if self.device != "cpu":
+            batch_size = max(batch_size, 128)
+
+        # Tokenize everything in one call, then batch by token length so
+        # each padded microbatch wastes as little compute as possible
+        enc = self.tokenizer(texts, padding=False, truncation=True, max_length=256)
+        order = np.argsort([len(ids) for ids in enc["input_ids"]])
+
+        result = None
+        with torch.inference_mode():
+            for start in range(0, len(order), batch_size):
+                idx = order[start:start + batch_size]
+                padded = self.tokenizer.pad(
+                    _batch_features(enc, idx),
+                    return_tensors="pt"
+                ).to(self.device)
+                out = self.model(**padded)
+                mask = padded["attention_mask"].unsqueeze(-1).float()
+                pooled = (out.last_hidden_state.float() * mask).sum(dim=1)
+                pooled = pooled / mask.sum(dim=1).clamp(min=1e-9)
+                if normalize_embeddings:
+                    pooled = F.normalize(pooled, dim=1)
+                pooled = pooled.cpu().numpy()
+                if result is None:
+                    result = np.empty((len(texts), pooled.shape[1]), dtype=pooled.dtype)
+                result[idx] = pooled
+
+        return result[0] if single else result
+
+def load_embedding_model():
+    """Load the quantized ONNX embedder if available, else the bf16 PyTorch path."""
+    if QUANTIZED_MODEL_DIR.exists():
+        try:
+            model = ONNXEmbedder(str(QUANTIZED_MODEL_DIR))
+            # Smoke-encode so a broken session fails here, at startup,
+            # instead of silently emptying every search result
+            model.encode("embedder smoke test")
+            logger.info(f"Loaded INT8 ONNX embedder from {QUANTIZED_MODEL_DIR}")
+            return model
+        except ImportError as e:
+            logger.warning(f"optimum/onnxruntime not installed, falling back to PyTorch: {e}")
+        except Exception as e:
+            logger.error(f"Error loading ONNX embedder, falling back to PyTorch: {e}")
+
+    model = TorchEmbedder()
+    model.encode("embedder smoke test")
+    return model
@@ -1,38 +1,95 @@
-from openai import OpenAI
-from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct
-from app.utils.config import settings
-from sentence_transformers import SentenceTransformer
+import asyncio
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import redis.asyncio as redis
+
+from openai import AsyncOpenAI
+from qdrant_client import QdrantClient, AsyncQdrantClient
+from qdrant_client.models import (
+    Distance, VectorParams, PointStruct,
+    ScalarQuantization, ScalarQuantizationConfig, ScalarType,
+    SearchParams, QuantizationSearchParams
+)
+from app.utils.config import get_settings
+from app.utils.query_cache import QueryCache
+from app.utils.embed_cache import EmbedCache
+from app.utils.chunk_store import ChunkStore
+from app.services.embedding import load_embedding_model
+from app.services.embed_batcher import EmbedBatcher
 import logging
 import httpx
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
+# Bump when the prompts or model change so stale cached answers expire
+CHAT_MODEL = "gpt-4o-mini"
+PROMPT_VERSION = "v1"
+ANSWER_CACHE_TTL = 3600
+
 class RAGService:
     """Service for RAG operations using Hugging Face and Qdrant."""
     
+    # Collections already verified in this process, shared across instances
+    _collections_verified: set[str] = set()
+
     def __init__(self):
+        settings = get_settings()
+
         # Use FREE Hugging Face embeddings instead of OpenAI
         print("Loading embedding model... (first time takes a minute)")
-        self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
+        self.embedding_model = load_embedding_model()
         print("Embedding model loaded!")
         
-        # Still need OpenAI for chat (but not for embeddings)
-        http_client = httpx.Client(timeout=30.0)
-        self.openai_client = OpenAI(
+        # Still need OpenAI for chat (but not for embeddings).
+        # HTTP/2 + a keepalive pool avoids TCP/TLS handshakes per call.
+        http_client = httpx.AsyncClient(
+            http2=True,
+            timeout=30.0,
+            limits=httpx.Limits(
+                max_connections=100,
+                max_keepalive_connections=50
+            )
+        )
+        self.openai_client = AsyncOpenAI(
             api_key=settings.openai_api_key,
             http_client=http_client
         )
         
+        # gRPC transport has lower per-call overhead than REST
         self.qdrant_client = QdrantClient(
             url=settings.qdrant_url,
-            api_key=settings.qdrant_api_key
+            api_key=settings.qdrant_api_key,
+            prefer_grpc=True,
+            grpc_options={"grpc.keepalive_time_ms": 30000}
+        )
+        # Async client for write paths so upserts can overlap network RTT
+        self.qdrant_aclient = AsyncQdrantClient(
+            url=settings.qdrant_url,
+            api_key=settings.qdrant_api_key,
+            prefer_grpc=True,
+            grpc_options={"grpc.keepalive_time_ms": 30000}
         )
-        self.collection_name = "physical_ai_textbook"
+        # v2: vectors are L2-normalized at ingest and scored with DOT;
+        # run index_book.py to populate after upgrading
+        self.collection_name = "physical_ai_textbook_v2"
+        self._search_cache = QueryCache(max_size=2000, ttl_seconds=300)
+        self._embed_cache = EmbedCache(model_name=type(self.embedding_model).__name__)
+        self._chunk_store = ChunkStore()
+        # Optional Redis cache for full answers (skipped if not configured)
+        self.redis = redis.from_url(settings.redis_url) if settings.redis_url else None
+        # One single-threaded forward per core; see TorchEmbedder thread pinning
+        self._embed_pool = ThreadPoolExecutor(max_workers=os.cpu_count() or 1)
+        self._embed_batcher = EmbedBatcher(self.embedding_model, self._embed_pool)
         self._ensure_collection()
     
     def _ensure_collection(self):
         """Create collection if it doesn't exist."""
+        if self.collection_name in self._collections_verified:
+            return
         try:
             collections = self.qdrant_client.get_collections().collections
             collection_names = [c.name for c in collections]
@@ -42,37 +99,67 @@ class RAGService:
                     collection_name=self.collection_name,
                     vectors_config=VectorParams(
                         size=384,  # Hugging Face model dimension
-                        distance=Distance.COSINE
+                        # Vectors are unit-length, so DOT equals cosine without
+                        # the per-candidate renormalization in the HNSW loop
+                        distance=Distance.DOT,
+                        on_disk=True
+                    ),
+                    # int8 vectors are 4x smaller, so the hot set fits in cache
+                    quantization_config=ScalarQuantization(
+                        scalar=ScalarQuantizationConfig(
+                            type=ScalarType.INT8,
+                            quantile=0.99,
+                            always_ram=True
+                        )
                     )
                 )
                 logger.info(f"Created collection: {self.collection_name}")
+            self._collections_verified.add(self.collection_name)
         except Exception as e:
             logger.error(f"Error ensuring collection: {e}")
     
     def embed_text(self, text: str) -> list[float]:
         """Generate embedding using FREE Hugging Face model."""
         try:
+            cached = self._embed_cache.get(text)
+            if cached is not None:
+                return cached.tolist()
+
             embedding = self.embedding_model.encode(text)
+            self._embed_cache.put(text, embedding)
             return embedding.tolist()
         except Exception as e:
             logger.error(f"Error embedding text: {e}")
             raise
     
+    async def _aembed(self, text: str) -> list[float]:
+        """Embed via the coalescing batcher without blocking the event loop."""
+        cached = self._embed_cache.get(text)
+        if cached is not None:
+            return cached.tolist()
+
+        embedding = await self._embed_batcher.embed(text)
+        self._embed_cache.put(text, embedding)
+        return embedding.tolist()
+
     async def add_document(self, text: str, source: str, doc_id: int):
         """Add a document to the vector store."""
         try:
             embedding = self.embed_text(text)
-            
-            self.qdrant_client.upsert(
+
+            # New content can change what any cached query should return
+            self._search_cache.clear()
+
+            # Chunk text stays local; the point only carries its source
+            self._chunk_store.put(doc_id, text)
+
+            await self.qdrant_aclient.upsert(
                 collection_name=self.collection_name,
                 points=[
                     PointStruct(
                         id=doc_id,
                         vector=embedding,
-                        payload={
-                            "text": text,
-                            "source": source
-                        }
+                        payload={"source": source}
                     )
                 ]
             )
@@ -81,80 +168,228 @@ class RAGService:
             logger.error(f"Error adding document: {e}")
             raise
     
+    def _encode_many(self, texts: list[str], batch_size: int = 64):
+        """Embed a list of texts in one tokenize + length-sorted batch pass."""
+        cached = [self._embed_cache.get(text) for text in texts]
+        missing = [i for i, vec in enumerate(cached) if vec is None]
+
+        if missing:
+            embeddings = self.embedding_model.encode(
+                [texts[i] for i in missing],
+                batch_size=batch_size,
+                convert_to_numpy=True,
+                normalize_embeddings=True,
+                show_progress_bar=True
+            )
+            for pos, i in enumerate(missing):
+                cached[i] = np.asarray(embeddings[pos], dtype=np.float32)
+                self._embed_cache.put(texts[i], cached[i])
+
+        return np.stack(cached)
+
+    async def add_documents_bulk(self, texts: list[str], sources: list[str], ids: list[int]):
+        """Add many documents at once with batched embedding and upserts."""
+        try:
+            embeddings = self._encode_many(texts, batch_size=64)
+
+            self._chunk_store.put_many(list(zip(ids, texts)))
+
+            points = [
+                PointStruct(
+                    id=ids[i],
+                    vector=embeddings[i].tolist(),
+                    payload={"source": sources[i]}
+                )
+                for i in range(len(texts))
+            ]
+
+            self._search_cache.clear()
+
+            # Overlap the HTTP round trips of the batch upserts
+            semaphore = asyncio.Semaphore(8)
+
+            async def upsert_batch(batch):
+                async with semaphore:
+                    await self.qdrant_aclient.upsert(
+                        collection_name=self.collection_name,
+                        points=batch
+                    )
+
+            batch_size = 128
+            await asyncio.gather(*[
+                upsert_batch(points[start:start + batch_size])
+                for start in range(0, len(points), batch_size)
+            ])
+
+            logger.info(f"Added {len(points)} documents in bulk")
+        except Exception as e:
+            logger.error(f"Error adding documents in bulk: {e}")
+            raise
+
     async def search(self, query: str, limit: int = 3) -> list[dict]:
         """Search for relevant content in the vector store."""
         try:
-            query_vector = self.embed_text(query)
-            
+            cache_key = (query.strip().lower(), limit)
+            cached = self._search_cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+            # Keep the event loop free while PyTorch/ONNX runs
+            query_vector = await self._aembed(query)
+
             results = self.qdrant_client.search(
                 collection_name=self.collection_name,
                 query_vector=query_vector,
-                limit=limit
+                limit=limit,
+                # Only fetch the fields we read ("text" covers legacy points)
+                with_payload=["text", "source"],
+                with_vectors=False,
+                search_params=SearchParams(
+                    hnsw_ef=64,
+                    exact=False,
+                    # Rescore with the original vectors to keep recall high
+                    quantization=QuantizationSearchParams(
+                        rescore=True,
+                        oversampling=2.0
+                    )
+                )
             )
-            
-            return [
+
+            # Texts come from the local store; legacy points still carry
+            # their text in the payload
+            chunk_texts = self._chunk_store.get_many([hit.id for hit in results])
+
+            hits = [
                 {
-                    "text": hit.payload["text"],
+                    "text": chunk_texts.get(hit.id, hit.payload.get("text", "")),
                     "source": hit.payload["source"],
                     "score": hit.score
                 }
                 for hit in results
             ]
+            self._search_cache.put(cache_key, hits)
+            return hits
         except Exception as e:
             logger.error(f"Error searching: {e}")
             return []
     
+    async def _retrieve_docs(self, question: str, context: str = None) -> list[dict]:
+        """Get relevant documents, either the user's selection or a search."""
+        if context:
+            return [{"text": context, "source": "Selected Text", "score": 1.0}]
+        return await self.search(question, limit=3)
+
+    def _build_messages(self, question: str, relevant_docs: list[dict]) -> list[dict]:
+        """Build the chat messages from the question and retrieved docs."""
+        context_text = "\n\n".join([
+            f"Source: {doc['source']}\n{doc['text']}"
+            for doc in relevant_docs
+        ])
+
+        system_prompt = """You are a helpful assistant for a Physical AI & Humanoid Robotics textbook.
+Answer questions based on the provided context from the textbook.
+If the answer is not in the context, say so clearly.
+Be concise and technical but easy to understand."""
+
+        user_prompt = f"""Context from textbook:
+{context_text}
+
+Question: {question}
+
+Please provide a clear and accurate answer based on the context above."""
+
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+
+    @staticmethod
+    def _answer_cache_key(question: str, context: str = None) -> str:
+        """Hash the question, context, model and prompt version into a key."""
+        raw = f"{CHAT_MODEL}|{PROMPT_VERSION}|{question.strip().lower()}|{context or ''}"
+        return "answer:" + hashlib.sha256(raw.encode()).hexdigest()
+
+    async def _get_cached_answer(self, key: str):
+        """Look up a cached answer; a Redis outage is never fatal."""
+        if self.redis is None:
+            return None
+        try:
+            cached = await self.redis.get(key)
+            return json.loads(cached) if cached else None
+        except Exception as e:
+            logger.error(f"Error reading answer cache: {e}")
+            return None
+
+    async def _put_cached_answer(self, key: str, result: dict):
+        """Store an answer with TTL; a Redis outage is never fatal."""
+        if self.redis is None:
+            return
+        try:
+            await self.redis.setex(key, ANSWER_CACHE_TTL, json.dumps(result))
+        except Exception as e:
+            logger.error(f"Error writing answer cache: {e}")
+
     async def generate_answer(self, question: str, context: str = None) -> dict:
         """Generate answer using OpenAI with RAG context."""
         try:
-            if context:
-                relevant_docs = [{"text": context, "source": "Selected Text", "score": 1.0}]
-            else:
-                relevant_docs = await self.search(question, limit=3)
-            
+            cache_key = self._answer_cache_key(question, context)
+            cached = await self._get_cached_answer(cache_key)
+            if cached is not None:
+                return cached
+
+            relevant_docs = await self._retrieve_docs(question, context)
+
             if not relevant_docs:
                 return {
                     "answer": "I couldn't find relevant information in the textbook to answer your question.",
                     "sources": [],
                     "confidence": 0.0
                 }
-            
-            context_text = "\n\n".join([
-                f"Source: {doc['source']}\n{doc['text']}"
-                for doc in relevant_docs
-            ])
-            
-            system_prompt = """You are a helpful assistant for a Physical AI & Humanoid Robotics textbook. 
-Answer questions based on the provided context from the textbook. 
-If the answer is not in the context, say so clearly.
-Be concise and technical but easy to understand."""
-            
-            user_prompt = f"""Context from textbook:
-{context_text}
-
-Question: {question}
 
-Please provide a clear and accurate answer based on the context above."""
-            
-            response = self.openai_client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
+            response = await self.openai_client.chat.completions.create(
+                model=CHAT_MODEL,
+                messages=self._build_messages(question, relevant_docs),
                 temperature=0.7,
                 max_tokens=500
             )
-            
+
             answer = response.choices[0].message.content
             sources = [doc["source"] for doc in relevant_docs]
-            
-            return {
+
+            result = {
                 "answer": answer,
                 "sources": sources,
                 "confidence": relevant_docs[0]["score"] if relevant_docs else 0.0
             }
-            
+            await self._put_cached_answer(cache_key, result)
+            return result
+
         except Exception as e:
             logger.error(f"Error generating answer: {e}")
+            raise
+
+    async def generate_answer_stream(self, question: str, context: str = None):
+        """Stream answer tokens as they arrive from OpenAI."""
+        try:
+            relevant_docs = await self._retrieve_docs(question, context)
+
+            if not relevant_docs:
+                yield "I couldn't find relevant information in the textbook to answer your question."
+                return
+
+            stream = await self.openai_client.chat.completions.create(
+                model=CHAT_MODEL,
+                messages=self._build_messages(question, relevant_docs),
+                temperature=0.7,
+                max_tokens=500,
+                stream=True
+            )
+
+            async for chunk in stream:
+                content = chunk.choices[0].delta.content
+                if content:
+                    yield content
+
+        except Exception as e:
+            logger.error(f"Error streaming answer: {e}")
             raise
\ No newline at end of file
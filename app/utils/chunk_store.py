@@ -0,0 +1,48 @@
+import sqlite3
+import threading
+
+class ChunkStore:
+    """Local ID -> chunk text store backing the compact Qdrant payload.
+
+    Points only carry their source in Qdrant; the chunk text lives here
+    keyed by point id, so search responses stay small on the wire and
+    the text is fetched locally after the hits come back.
+    """
+
+    def __init__(self, path: str = "chunks.db"):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS chunks (id INTEGER PRIMARY KEY, text TEXT)"
+        )
+        self._conn.commit()
+        self._lock = threading.Lock()
+
+    def put(self, doc_id: int, text: str):
+        """Store one chunk's text under its point id."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO chunks (id, text) VALUES (?, ?)",
+                (doc_id, text)
+            )
+            self._conn.commit()
+
+    def put_many(self, items: list[tuple[int, str]]):
+        """Store many (id, text) pairs in one transaction."""
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO chunks (id, text) VALUES (?, ?)",
+                items
+            )
+            self._conn.commit()
+
+    def get_many(self, ids: list[int]) -> dict[int, str]:
+        """Fetch texts for a list of point ids."""
+        if not ids:
+            return {}
+        placeholders = ",".join("?" * len(ids))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT id, text FROM chunks WHERE id IN ({placeholders})",
+                list(ids)
+            ).fetchall()
+        return dict(rows)
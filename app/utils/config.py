@@ -1,16 +1,21 @@
+from functools import lru_cache
 from pydantic_settings import BaseSettings
 from typing import Optional
 
 class Settings(BaseSettings):
     """Application configuration from environment variables."""
-    
+
     openai_api_key: str
     qdrant_url: str
     qdrant_api_key: str
     database_url: Optional[str] = None
-    
+    redis_url: Optional[str] = None
+
     class Config:
         env_file = ".env"
         case_sensitive = False
 
-settings = Settings()
\ No newline at end of file
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Parse settings once per process and reuse them."""
+    return Settings()
\ No newline at end of file
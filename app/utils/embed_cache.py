@@ -0,0 +1,47 @@
+import hashlib
+import sqlite3
+import threading
+
+import numpy as np
+
+class EmbedCache:
+    """On-disk cache of text embeddings keyed by content hash.
+
+    Re-indexing runs hit the same headers and boilerplate chunks over
+    and over; caching by hash skips the encode entirely on repeats.
+    The model name is part of the key so switching models invalidates
+    old entries automatically.
+    """
+
+    def __init__(self, path: str = ".embed_cache.db", model_name: str = "default"):
+        self.model_name = model_name
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB)"
+        )
+        self._conn.commit()
+        self._lock = threading.Lock()
+
+    def _key(self, text: str) -> str:
+        normalized = f"{self.model_name}:{text.strip()}"
+        return hashlib.blake2b(normalized.encode()).hexdigest()
+
+    def get(self, text: str):
+        """Return the cached embedding for text, or None on miss."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT vector FROM embeddings WHERE key = ?", (self._key(text),)
+            ).fetchone()
+        if row is None:
+            return None
+        return np.frombuffer(row[0], dtype=np.float32)
+
+    def put(self, text: str, vector):
+        """Store an embedding as float32 bytes."""
+        blob = np.asarray(vector, dtype=np.float32).tobytes()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                (self._key(text), blob)
+            )
+            self._conn.commit()
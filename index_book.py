@@ -1,4 +1,5 @@
 import os
+import re
 import asyncio
 from pathlib import Path
 from app.services.rag_service import RAGService
@@ -24,61 +25,70 @@ async def index_markdown_files():
     
     print(f"Found {len(md_files)} markdown files")
     
+    # Collect every chunk first so embedding and upserts run in batches
+    texts = []
+    sources = []
+    ids = []
     doc_id = 1
-    
+
     for md_file in md_files:
         try:
             # Read file content
             with open(md_file, 'r', encoding='utf-8') as f:
                 content = f.read()
-            
+
             # Skip empty files
             if len(content.strip()) < 50:
                 continue
-            
+
             # Get relative path as source
             source = str(md_file.relative_to(docs_path))
-            
+
             # Split content into chunks (max 1000 chars per chunk)
             chunks = split_content(content, max_length=1000)
-            
+
             for i, chunk in enumerate(chunks):
                 chunk_source = f"{source} (Part {i+1})" if len(chunks) > 1 else source
-                
-                print(f"Indexing: {chunk_source}")
-                await rag_service.add_document(
-                    text=chunk,
-                    source=chunk_source,
-                    doc_id=doc_id
-                )
+                texts.append(chunk)
+                sources.append(chunk_source)
+                ids.append(doc_id)
                 doc_id += 1
-            
-            print(f"✓ Indexed: {source}")
-            
+
+            print(f"✓ Collected: {source} ({len(chunks)} chunks)")
+
         except Exception as e:
-            print(f"✗ Error indexing {md_file}: {e}")
-    
-    print(f"\n✓ Successfully indexed {doc_id - 1} document chunks!")
+            print(f"✗ Error reading {md_file}: {e}")
+
+    if not texts:
+        print("No content to index!")
+        return
+
+    print(f"Embedding and upserting {len(texts)} chunks...")
+    await rag_service.add_documents_bulk(texts=texts, sources=sources, ids=ids)
+
+    print(f"\n✓ Successfully indexed {len(texts)} document chunks!")
+
+# Matches one paragraph: consecutive non-blank lines
+_PARAGRAPH_RE = re.compile(r'[^\n]+(?:\n(?!\n)[^\n]*)*')
 
 def split_content(text: str, max_length: int = 1000) -> list[str]:
-    """Split text into chunks by paragraphs."""
+    """Split text into chunks by paragraphs in a single linear pass."""
     chunks = []
-    current_chunk = ""
-    
-    # Split by double newlines (paragraphs)
-    paragraphs = text.split('\n\n')
-    
-    for para in paragraphs:
-        if len(current_chunk) + len(para) < max_length:
-            current_chunk += para + "\n\n"
-        else:
-            if current_chunk:
-                chunks.append(current_chunk.strip())
-            current_chunk = para + "\n\n"
-    
-    if current_chunk:
-        chunks.append(current_chunk.strip())
-    
+    buf = []
+    buf_len = 0
+
+    for match in _PARAGRAPH_RE.finditer(text):
+        para = match.group()
+        if buf and buf_len + len(para) >= max_length:
+            chunks.append('\n\n'.join(buf))
+            buf = []
+            buf_len = 0
+        buf.append(para)
+        buf_len += len(para) + 2  # account for the joined separator
+
+    if buf:
+        chunks.append('\n\n'.join(buf))
+
     return chunks if chunks else [text]
 
 if __name__ == "__main__":
@@ -0,0 +1,36 @@
+"""Export all-MiniLM-L6-v2 to ONNX and quantize it to INT8.
+
+Run once at build time; the server picks up the quantized model
+automatically from onnx_model_int8/ (see app/services/embedding.py).
+"""
+
+from pathlib import Path
+
+from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTQuantizer
+from optimum.onnxruntime.configuration import AutoQuantizationConfig
+from transformers import AutoTokenizer
+
+from app.services.embedding import MODEL_NAME, QUANTIZED_MODEL_DIR
+
+EXPORT_DIR = Path("onnx_model")
+
+def quantize():
+    print(f"Exporting {MODEL_NAME} to ONNX...")
+    model = ORTModelForFeatureExtraction.from_pretrained(MODEL_NAME, export=True)
+    model.save_pretrained(EXPORT_DIR)
+
+    tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
+    tokenizer.save_pretrained(EXPORT_DIR)
+
+    print("Applying dynamic INT8 quantization...")
+    quantizer = ORTQuantizer.from_pretrained(EXPORT_DIR)
+    quantizer.quantize(
+        save_dir=QUANTIZED_MODEL_DIR,
+        quantization_config=AutoQuantizationConfig.avx512_vnni(is_static=False)
+    )
+    tokenizer.save_pretrained(QUANTIZED_MODEL_DIR)
+
+    print(f"✓ Quantized model saved to {QUANTIZED_MODEL_DIR}")
+
+if __name__ == "__main__":
+    quantize()